@@ -1,6 +1,15 @@
 import sys
 import os
+import io
+import gzip
+import json
+import time
+import hashlib
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import argparse
 import dataclasses
 import zipfile
@@ -9,13 +18,26 @@ from enum import Enum
 from pathlib import Path
 import subprocess
 import shutil
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 import stat
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 class ArchiveType(Enum):
     TGZ = 1
     ZIP = 2
+    ZSTD = 3
+
+
+ARCHIVE_TYPE_EXTENSIONS = {
+    ArchiveType.TGZ: "tar.gz",
+    ArchiveType.ZIP: "zip",
+    ArchiveType.ZSTD: "tar.zst",
+}
 
 class ShellType(Enum):
     BASH = 1
@@ -67,7 +89,7 @@ platforms = {
         ),
         jar_platform_classifier="linux-x86_64",
         shell_type=ShellType.BASH,
-        compress_to=ArchiveType.TGZ,
+        compress_to=ArchiveType.ZSTD,
     ),
 
     "macos-aarch64": Platform(
@@ -79,7 +101,7 @@ platforms = {
         ),
         jar_platform_classifier="macos-aarch64",
         shell_type=ShellType.BASH,
-        compress_to=ArchiveType.TGZ,
+        compress_to=ArchiveType.ZSTD,
     ),
 }
 
@@ -100,6 +122,48 @@ def generate_bat_script(java_exec_path: str, jar_path: str) -> str:
     return result
 
 
+PACKAGE_CACHE_HASH_FILE = LIBS_DIR / ".package-cache-hash"
+
+
+def compute_source_hash() -> Optional[str]:
+    """
+        Hash every git-tracked file's path, mtime and size. Good enough to
+        tell whether the Gradle outputs could have changed, without
+        reading file contents. Returns None when git can't list files.
+    """
+    result = subprocess.run(
+        ["git", "ls-files"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None
+
+    sha256 = hashlib.sha256()
+    for relative_path in sorted(result.stdout.splitlines()):
+        try:
+            file_stat = (PROJECT_ROOT / relative_path).stat()
+        except OSError:
+            # Tracked but deleted from the working tree.
+            sha256.update(f"{relative_path}:gone".encode())
+            continue
+        sha256.update(f"{relative_path}:{file_stat.st_mtime_ns}:{file_stat.st_size}".encode())
+    return sha256.hexdigest()
+
+
+def gradle_outputs_cached(version_tag: str, source_hash: Optional[str]) -> bool:
+    if source_hash is None:
+        return False
+    if not PACKAGE_CACHE_HASH_FILE.exists():
+        return False
+    if PACKAGE_CACHE_HASH_FILE.read_text().strip() != source_hash:
+        return False
+    for platform in platforms.values():
+        jar_name = f"janice-{version_tag}-{platform.jar_platform_classifier}.jar"
+        if not (LIBS_DIR / jar_name).exists():
+            return False
+    return True
+
+
 def gradle_package_all() -> int:
     gradle_exe = "gradlew" if os.name != "nt" else "gradlew.bat"
     gradle_exe_path = PROJECT_ROOT / gradle_exe
@@ -112,93 +176,602 @@ def gradle_package_all() -> int:
     return process.returncode
 
 
-def remove_readonly(func: Callable[..., Any], path: str, excinfo: Any) -> None:
-    """Clear the readonly bit and re-attempt the file removal."""
-    os.chmod(path, stat.S_IWRITE)
-    func(path)
+class FileLock:
+    """
+        Cross-process lock built on exclusive lock-file creation, used to
+        keep parallel platform workers from racing on the shared JDK cache.
+        If a worker dies while holding the lock, delete the .lock file
+        under JDK_DIR manually.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def __enter__(self) -> "FileLock":
+        while True:
+            try:
+                self.fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                return self
+            except FileExistsError:
+                time.sleep(0.5)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        os.close(self.fd)
+        os.unlink(self.path)
+
+
+def force_writable(path: Path) -> None:
+    """Clear the readonly bit on every file under path in one pass."""
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                os.chmod(os.path.join(root, name), stat.S_IWRITE)
+            except OSError:
+                pass
+
+
+def rmtree_robust(path: Path) -> None:
+    """
+        shutil.rmtree that copes with the readonly files a JDK tree
+        contains on Windows. One linear pre-pass clearing the readonly
+        bits (os.walk is scandir-based) is far cheaper than the old
+        onexc handler raising and retrying chmod per offending file.
+    """
+    if os.name == 'nt':
+        force_writable(path)
+    shutil.rmtree(path)
 
 
 def tar_permission_filter(tarinfo: tarfile.TarInfo) -> tarfile.TarInfo:
     if os.name != "nt":
         return tarinfo
-    
+
     path = Path(tarinfo.name).as_posix()
-    
+
     if tarinfo.isdir() or tarinfo.name.endswith('java') or tarinfo.name.endswith('.sh') or ('/bin/' in path):
         tarinfo.mode = 0o755
 
     return tarinfo
 
 
-def package_platform(platform: Platform, version_tag: str) -> int:
-    # 1. Ensure directories exist
-    if TMP_DIR.exists():
-        shutil.rmtree(TMP_DIR, onexc=remove_readonly)
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    JDK_DIR.mkdir(parents=True, exist_ok=True)
-    TMP_DIR.mkdir(parents=True, exist_ok=True)
+class QueueWriter(io.RawIOBase):
+    """
+        A write-only file object that hands each chunk to a queue,
+        so another thread can consume it. Put None to signal EOF.
+    """
 
-    # platform_tmp_folder: The working directory for this specific platform
-    platform_tmp_folder = TMP_DIR / platform.key
-    if platform_tmp_folder.exists():
-        shutil.rmtree(platform_tmp_folder, onexc=remove_readonly)
-    platform_tmp_folder.mkdir(parents=True)
+    def __init__(self, chunk_queue: "queue.Queue[Optional[bytes]]") -> None:
+        self.chunk_queue = chunk_queue
 
-    # 2. Download JDK
-    print(f"[{platform.key}] Downloading JDK...")
-    extension = 'zip' if platform.jdk.archive_type == ArchiveType.ZIP else 'tar.gz'
-    jdk_archive_path = JDK_DIR / f"{platform.jdk.id}.{extension}"
-    jdk_archive_path_tmp = JDK_DIR / f"jdk.part"
+    def writable(self) -> bool:
+        return True
 
-    if jdk_archive_path_tmp.exists():
-        jdk_archive_path_tmp.unlink()
-    
+    def write(self, data) -> int:
+        self.chunk_queue.put(bytes(data))
+        return len(data)
 
-    if jdk_archive_path.exists():
-        print(f"[{platform.key}] JDK found in cache, skipping download.")
-    else:
-        with requests.get(platform.jdk.download_url, stream=True) as r:
+
+def tarfile_compress_tar_gz(final_path: Path, archive_path: Path, level: int) -> None:
+    """
+        Pure-Python .tar.gz fallback.
+
+        Tar-ing and gzip-ing run on separate threads connected by a queue,
+        so disk reads overlap with compression instead of alternating
+        on one thread.
+    """
+    final_dir_name = final_path.name
+    chunk_queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=16)
+    compress_error: list[BaseException] = []
+
+    def compress_worker() -> None:
+        try:
+            with open(archive_path, 'wb') as f:
+                with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=level, mtime=0) as gz:
+                    while True:
+                        chunk = chunk_queue.get()
+                        if chunk is None:
+                            break
+                        gz.write(chunk)
+        except BaseException as e:
+            compress_error.append(e)
+            # Drain so the producer never blocks on a full queue.
+            while chunk_queue.get() is not None:
+                pass
+
+    worker = threading.Thread(target=compress_worker)
+    worker.start()
+    try:
+        # "w|" is streaming mode: no seeks, no offset fixup pass.
+        with tarfile.open(mode="w|", fileobj=QueueWriter(chunk_queue)) as tar:
+            tar.add(final_path, arcname=final_dir_name, filter=tar_permission_filter)
+    finally:
+        chunk_queue.put(None)
+        worker.join()
+
+    if compress_error:
+        raise compress_error[0]
+
+
+def compress_tar_gz(final_path: Path, archive_path: Path, level: Optional[int] = None) -> None:
+    """
+        Pack final_path into archive_path (.tar.gz).
+
+        Prefers system tar piped into pigz, which spreads the DEFLATE work
+        across all cores and still produces a standard gzip stream. Falls
+        back to Python's tarfile when pigz isn't installed.
+
+        The default level 6 is the knee of the curve for this payload:
+        the JDK is mostly pre-compressed jmods, so level 9 costs several
+        times the CPU for a size win of a percent or two.
+    """
+    if level is None:
+        level = 6
+    final_dir_name = final_path.name
+
+    # tar_permission_filter is only needed on Windows, where we don't take
+    # the external-tools path anyway.
+    if os.name != "nt" and shutil.which("pigz") is not None:
+        with open(archive_path, 'wb') as f:
+            tar_proc = subprocess.Popen(
+                ["tar", "-C", str(final_path.parent), "-cf", "-", final_dir_name],
+                stdout=subprocess.PIPE,
+            )
+            pigz_proc = subprocess.Popen(
+                ["pigz", "-n", f"-{level}", "-p", str(os.cpu_count() or 1)],
+                stdin=tar_proc.stdout,
+                stdout=f,
+            )
+            tar_proc.stdout.close()  # let tar see pigz exit
+            pigz_returncode = pigz_proc.wait()
+            tar_returncode = tar_proc.wait()
+
+        if tar_returncode == 0 and pigz_returncode == 0:
+            return
+        print(f"Warning: tar | pigz failed, falling back to tarfile.")
+
+    tarfile_compress_tar_gz(final_path, archive_path, level)
+
+
+def compress_tar_zst(final_path: Path, archive_path: Path, level: Optional[int] = None) -> None:
+    """
+        Pack final_path into archive_path (.tar.zst).
+
+        threads=-1 lets libzstd spread compression over all cores, so no
+        external tool is needed for the parallel win here. Level 3 is
+        zstd's sweet spot on mostly pre-compressed payloads like a JDK.
+    """
+    if level is None:
+        level = 3
+    final_dir_name = final_path.name
+    cctx = zstandard.ZstdCompressor(level=level, threads=-1)
+    with open(archive_path, 'wb') as f:
+        with cctx.stream_writer(f) as zst:
+            with tarfile.open(mode="w|", fileobj=zst) as tar:
+                tar.add(final_path, arcname=final_dir_name, filter=tar_permission_filter)
+
+
+def scan_files(folder: Path, relative_to: Path):
+    """
+        Recursively yield (absolute path, archive name) for every regular
+        file under folder. Built on os.scandir, which reuses the dirent
+        type info instead of stat-ing each entry like os.walk does.
+    """
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            entry_path = Path(entry.path)
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry_path, relative_to)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry_path, entry_path.relative_to(relative_to)
+
+
+# File types that are already compressed internally (jmods and jars are
+# DEFLATE containers themselves); deflating them again in the outer
+# archive burns CPU for essentially no size win, so store them raw.
+ALREADY_COMPRESSED_SUFFIXES = {".jmod", ".jar", ".zip", ".gz", ".zst", ".jpg", ".png"}
+
+
+def compress_zip(final_path: Path, archive_path: Path, level: Optional[int] = None) -> None:
+    """
+        Pack the contents of final_path into archive_path (.zip).
+
+        Prefers 7z with multithreading enabled; falls back to Python's
+        zipfile when 7z isn't installed.
+    """
+    if archive_path.exists():
+        archive_path.unlink()
+
+    if shutil.which("7z") is not None:
+        command = ["7z", "a", "-tzip", "-mmt=on"]
+        if level is not None:
+            command.append(f"-mx={level}")
+        command += [str(archive_path.absolute()), "*"]
+        process = subprocess.run(command, cwd=final_path)
+        if process.returncode == 0:
+            return
+        print(f"Warning: 7z failed, falling back to zipfile.")
+        if archive_path.exists():
+            archive_path.unlink()
+
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as zipf:
+        for file_path, arcname in scan_files(final_path, final_path):
+            # Build the ZipInfo ourselves: one stat per file (ZipFile.write
+            # would re-stat), and a fixed timestamp for reproducible output.
+            zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+            if file_path.suffix.lower() in ALREADY_COMPRESSED_SUFFIXES:
+                zinfo.compress_type = zipfile.ZIP_STORED
+            else:
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo.date_time = (1980, 1, 1, 0, 0, 0)
+            with zipf.open(zinfo, 'w') as dst, open(file_path, 'rb', buffering=0) as src:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+DOWNLOAD_BLOCK_SIZE = 1024 * 1024  # 1MB
+DOWNLOAD_RANGE_WORKERS = 8
+
+# One session per process: TLS connections get reused across the probe,
+# ranged fetches and revalidation instead of handshaking every time, and
+# transient CDN errors are retried with backoff for free.
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+))
+
+
+class DownloadProgress:
+    """
+        Download progress bar. Redraws at most every 250 ms plus once on
+        completion -- formatting and flushing per 1 MiB chunk is
+        measurable on fast links -- and stays silent entirely when
+        stdout isn't a terminal (CI logs).
+    """
+
+    RENDER_INTERVAL = 0.25
+
+    def __init__(self, total_size: int, initial: int = 0) -> None:
+        self.total_size = total_size
+        self.downloaded = initial
+        self.enabled = total_size > 0 and sys.stdout.isatty()
+        self.last_render = 0.0
+
+    def advance(self, byte_count: int) -> None:
+        self.downloaded += byte_count
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_render < self.RENDER_INTERVAL and self.downloaded != self.total_size:
+            return
+        self.last_render = now
+        done = int(50 * self.downloaded / self.total_size)
+        # Use \r to overwrite the same line in the console
+        sys.stdout.write(f"\r[{'=' * done}{' ' * (50-done)}] {self.downloaded / (1024*1024):.2f}/{self.total_size / (1024*1024):.2f} MB")
+        sys.stdout.flush()
+
+    def finish(self) -> None:
+        if self.enabled:
+            sys.stdout.write("\n") # New line after download completion
+
+
+def copy_response_to(r: requests.Response, sinks: list, on_advance: Callable[[int], None]) -> None:
+    """
+        Copy the response body into every sink file object through one
+        reusable buffer. Reading r.raw directly skips iter_content's
+        per-chunk bytes allocation and generator overhead; the sinks see
+        the bytes exactly as they came off the wire.
+    """
+    r.raw.decode_content = False
+    buffer = bytearray(DOWNLOAD_BLOCK_SIZE)
+    view = memoryview(buffer)
+    while True:
+        byte_count = r.raw.readinto(buffer)
+        if not byte_count:
+            break
+        for sink in sinks:
+            sink.write(view[:byte_count])
+        on_advance(byte_count)
+
+
+def probe_download(url: str) -> tuple[int, bool, Optional[str]]:
+    """
+        Ask the server about url with a 1-byte range request. Returns
+        (total size in bytes, whether range requests are supported, etag).
+    """
+    with HTTP_SESSION.get(url, headers={"Range": "bytes=0-0"}, stream=True) as r:
+        r.raise_for_status()
+        etag = r.headers.get('ETag')
+        if r.status_code == 206:
+            # Content-Range looks like: bytes 0-0/123456789
+            content_range = r.headers.get('Content-Range', '')
+            if '/' in content_range:
+                return int(content_range.rsplit('/', 1)[-1]), True, etag
+        return int(r.headers.get('content-length', 0)), False, etag
+
+
+def download_single(url: str, dest_path: Path) -> None:
+    """Plain single-connection download with a progress bar."""
+    with HTTP_SESSION.get(url, stream=True) as r:
+        r.raise_for_status()
+        total_size = int(r.headers.get('content-length', 0))
+        progress = DownloadProgress(total_size)
+
+        with open(dest_path, 'wb') as f:
+            copy_response_to(r, [f], progress.advance)
+        progress.finish()
+
+
+def download_ranged(url: str, dest_path: Path, total_size: int) -> None:
+    """
+        Download url over several connections at once, each fetching its
+        own byte range into the right offset of dest_path. A single TCP
+        stream rarely saturates the link to a release CDN; N streams get
+        much closer.
+    """
+    # Pre-size the file so every worker can write at its own offset.
+    with open(dest_path, 'wb') as f:
+        f.truncate(total_size)
+
+    progress_lock = threading.Lock()
+    progress = DownloadProgress(total_size)
+
+    def locked_advance(byte_count: int) -> None:
+        with progress_lock:
+            progress.advance(byte_count)
+
+    def fetch_range(lo: int, hi: int) -> None:
+        with HTTP_SESSION.get(url, headers={"Range": f"bytes={lo}-{hi}"}, stream=True) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise RuntimeError(f"Server ignored range request for {url} (HTTP {r.status_code})")
+            with open(dest_path, 'r+b') as f:
+                f.seek(lo)
+                copy_response_to(r, [f], locked_advance)
+
+    range_size = (total_size + DOWNLOAD_RANGE_WORKERS - 1) // DOWNLOAD_RANGE_WORKERS
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_RANGE_WORKERS) as executor:
+        futures = [
+            executor.submit(fetch_range, lo, min(lo + range_size, total_size) - 1)
+            for lo in range(0, total_size, range_size)
+        ]
+        for future in futures:
+            future.result()
+    progress.finish()
+
+
+def extract_tar_stream(tar: tarfile.TarFile, dest: Path) -> None:
+    """
+        Extract a tarfile opened in streaming mode (one forward pass,
+        no random access), then fix executable bits like step 3 does.
+    """
+    members = []
+    for member in tar:
+        tar.extract(member, dest, filter='data')
+        members.append(member)
+
+    # Fix permissions.
+    for member in members:
+        if not member.isfile():
+            continue
+        if member.mode & 0o111:
+            extract_path = dest / member.name
+            os.chmod(extract_path, os.stat(extract_path).st_mode | 0o111)
+
+
+def download_single_extract_tgz(url: str, dest_path: Path, extract_to: Path) -> None:
+    """
+        Single-stream download teed into on-the-fly extraction: each chunk
+        goes both to the cache file and, through a pipe, to a streaming
+        tar reader on another thread. The archive is written to disk once
+        and never read back.
+    """
+    read_fd, write_fd = os.pipe()
+    extract_error: list[BaseException] = []
+
+    def extract_worker() -> None:
+        with os.fdopen(read_fd, 'rb') as pipe_read:
+            try:
+                with tarfile.open(
+                    mode='r|gz', fileobj=pipe_read,
+                    bufsize=DOWNLOAD_BLOCK_SIZE, copybufsize=DOWNLOAD_BLOCK_SIZE,
+                ) as tar:
+                    extract_tar_stream(tar, extract_to)
+            except BaseException as e:
+                extract_error.append(e)
+                # Drain so the downloader never blocks on a full pipe.
+                while pipe_read.read(DOWNLOAD_BLOCK_SIZE):
+                    pass
+
+    worker = threading.Thread(target=extract_worker)
+    worker.start()
+    pipe_write = os.fdopen(write_fd, 'wb')
+    try:
+        with HTTP_SESSION.get(url, stream=True) as r:
             r.raise_for_status()
             total_size = int(r.headers.get('content-length', 0))
-            block_size = 1024 * 1024  # 1MB
-            downloaded = 0
-            
-            with open(jdk_archive_path_tmp, 'wb') as f:
-                for data in r.iter_content(block_size):
-                    f.write(data)
-                    downloaded += len(data)
-                    if total_size > 0:
-                        done = int(50 * downloaded / total_size)
-                        # Use \r to overwrite the same line in the console
-                        sys.stdout.write(f"\r[{'=' * done}{' ' * (50-done)}] {downloaded / (1024*1024):.2f}/{total_size / (1024*1024):.2f} MB")
-                        sys.stdout.flush()
-            sys.stdout.write("\n") # New line after download completion
+            progress = DownloadProgress(total_size)
+
+            with open(dest_path, 'wb') as f:
+                copy_response_to(r, [f, pipe_write], progress.advance)
+            progress.finish()
+    finally:
+        pipe_write.close()  # EOF for the extractor
+        worker.join()
+
+    if extract_error:
+        raise extract_error[0]
+
+
+def download_resume(url: str, dest_path: Path, resume_from: int, total_size: int) -> None:
+    """Continue a partial single-stream download from byte resume_from."""
+    with HTTP_SESSION.get(url, headers={"Range": f"bytes={resume_from}-"}, stream=True) as r:
+        r.raise_for_status()
+        if r.status_code != 206:
+            # Server sent the whole file anyway; start over.
+            mode = 'wb'
+            progress = DownloadProgress(total_size)
+        else:
+            mode = 'ab'
+            progress = DownloadProgress(total_size, initial=resume_from)
+
+        with open(dest_path, mode) as f:
+            copy_response_to(r, [f], progress.advance)
+        progress.finish()
 
-        jdk_archive_path_tmp.rename(jdk_archive_path)
+
+def hash_file(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(DOWNLOAD_BLOCK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def jdk_meta_path(jdk: JDK) -> Path:
+    return JDK_DIR / f"{jdk.id}.meta.json"
+
+
+def write_jdk_meta(jdk: JDK, archive_path: Path, etag: Optional[str]) -> None:
+    meta = {
+        "etag": etag,
+        "size": archive_path.stat().st_size,
+        "sha256": hash_file(archive_path),
+    }
+    with open(jdk_meta_path(jdk), 'w') as f:
+        json.dump(meta, f)
+
+
+def validate_jdk_cache(jdk: JDK, archive_path: Path) -> bool:
+    """
+        Decide whether the cached JDK archive can be used: its size and
+        sha256 must match the sidecar metadata recorded at download time,
+        and when an ETag is known, the server gets a chance to tell us
+        the release asset changed.
+    """
+    meta_path = jdk_meta_path(jdk)
+    if not meta_path.exists():
+        # Cache entry from before metadata existed; record what we have.
+        write_jdk_meta(jdk, archive_path, None)
+        return True
+
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+
+    if meta.get("size") != archive_path.stat().st_size:
+        print(f"Cached {archive_path.name} has wrong size, re-downloading.")
+        return False
+    if meta.get("sha256") != hash_file(archive_path):
+        print(f"Cached {archive_path.name} failed checksum, re-downloading.")
+        return False
+
+    if meta.get("etag"):
+        try:
+            with HTTP_SESSION.get(
+                jdk.download_url,
+                headers={"If-None-Match": meta["etag"], "Range": "bytes=0-0"},
+                stream=True,
+            ) as r:
+                if r.status_code not in (304, 206, 200):
+                    r.raise_for_status()
+                if r.status_code != 304 and r.headers.get('ETag') != meta["etag"]:
+                    print(f"Release asset behind {archive_path.name} changed, re-downloading.")
+                    return False
+        except requests.RequestException as e:
+            print(f"Warning: could not revalidate {archive_path.name} ({e}), using cached copy.")
+
+    return True
+
+
+def download_jdk(jdk: JDK, dest_path: Path, extract_to: Optional[Path] = None) -> tuple[Optional[str], bool]:
+    """
+        Download the JDK archive to dest_path. Returns the server's ETag
+        and whether the archive was already extracted to extract_to on
+        the fly (only possible for tar.gz on a sequential stream).
+    """
+    total_size, supports_ranges, etag = probe_download(jdk.download_url)
+
+    resume_from = 0
+    if dest_path.exists():
+        part_size = dest_path.stat().st_size
+        # Only a partial single-stream download is prefix-complete and
+        # safe to continue. A ranged download pre-sizes the file, so its
+        # leftovers are full-sized but full of holes -- start those over.
+        if supports_ranges and 0 < part_size < total_size:
+            resume_from = part_size
+        else:
+            dest_path.unlink()
+
+    if resume_from > 0:
+        print(f"Resuming download from {resume_from / (1024*1024):.2f} MB...")
+        download_resume(jdk.download_url, dest_path, resume_from, total_size)
+    elif supports_ranges and total_size > 0:
+        # Parallel ranges beat overlapping with extraction: the network
+        # is the bottleneck here, not the second read of the archive.
+        download_ranged(jdk.download_url, dest_path, total_size)
+    elif extract_to is not None and jdk.archive_type == ArchiveType.TGZ:
+        download_single_extract_tgz(jdk.download_url, dest_path, extract_to)
+        return etag, True
+    else:
+        download_single(jdk.download_url, dest_path)
+
+    return etag, False
+
+
+def package_platform(platform: Platform, version_tag: str, use_gzip: bool = False, keep_tree: bool = False,
+                     compress_level: Optional[int] = None) -> int:
+    # 1. Ensure directories exist
+    # The shared WORK_DIR layout is prepared by main() before workers
+    # start; only this platform's folder is touched here.
+    # platform_tmp_folder: the package tree for this specific platform.
+    # It already carries the final directory name, so it can be archived
+    # in place without a rename first.
+    final_dir_name = f"janice-{version_tag}-{platform.key}"
+    platform_work_folder = TMP_DIR / platform.key
+    platform_tmp_folder = platform_work_folder / final_dir_name
+    if platform_work_folder.exists():
+        rmtree_robust(platform_work_folder)
+    platform_tmp_folder.mkdir(parents=True)
+
+    # 2. Download JDK
+    print(f"[{platform.key}] Downloading JDK...")
+    extension = ARCHIVE_TYPE_EXTENSIONS[platform.jdk.archive_type]
+    jdk_archive_path = JDK_DIR / f"{platform.jdk.id}.{extension}"
+    jdk_archive_path_tmp = JDK_DIR / f"{platform.jdk.id}.part"
+
+    # Two workers could share a JDK archive; make sure only one downloads.
+    # A leftover .part file is kept: download_jdk resumes it when it can.
+    extracted_on_the_fly = False
+    with FileLock(JDK_DIR / f"{platform.jdk.id}.lock"):
+        if jdk_archive_path.exists() and validate_jdk_cache(platform.jdk, jdk_archive_path):
+            print(f"[{platform.key}] JDK found in cache, skipping download.")
+        else:
+            if jdk_archive_path.exists():
+                jdk_archive_path.unlink()
+            etag, extracted_on_the_fly = download_jdk(
+                platform.jdk, jdk_archive_path_tmp, extract_to=platform_tmp_folder)
+            jdk_archive_path_tmp.rename(jdk_archive_path)
+            write_jdk_meta(platform.jdk, jdk_archive_path, etag)
 
     # 3. Unzip/Extract JDK into platform_tmp_folder
-    print(f"[{platform.key}] Extracting JDK...")
-    if platform.jdk.archive_type == ArchiveType.ZIP:
+    if extracted_on_the_fly:
+        print(f"[{platform.key}] JDK already extracted during download.")
+    elif platform.jdk.archive_type == ArchiveType.ZIP:
+        print(f"[{platform.key}] Extracting JDK...")
         with zipfile.ZipFile(jdk_archive_path, 'r') as zip_ref:
             zip_ref.extractall(platform_tmp_folder)
     else:
-        with tarfile.open(jdk_archive_path, 'r:gz') as tar_ref:
-            # Using filter='data' to resolve Python 3.14 DeprecationWarning
-            # This is available in Python 3.12+ and 3.11.4+
-            try:
-                tar_ref.extractall(platform_tmp_folder, filter='data')
-            except TypeError:
-                # Fallback for older Python versions that don't support the filter argument
-                tar_ref.extractall(platform_tmp_folder)
-
-            # Fix permissions.
-            for member in tar_ref.getmembers():
-                if not member.isfile():
-                    continue
-                if member.mode & 0o111:
-                    extract_path = platform_tmp_folder / member.name
-                    os.chmod(extract_path, os.stat(extract_path).st_mode | 0o111)
-                    
+        print(f"[{platform.key}] Extracting JDK...")
+        # "r|gz" is streaming mode: one forward pass, no member index,
+        # no seeking back through the compressed stream. The big buffers
+        # amortize inflate calls and write syscalls.
+        with tarfile.open(
+            jdk_archive_path, mode='r|gz',
+            bufsize=DOWNLOAD_BLOCK_SIZE, copybufsize=DOWNLOAD_BLOCK_SIZE,
+        ) as tar_ref:
+            extract_tar_stream(tar_ref, platform_tmp_folder)
 
     # 4. Copy JAR from LIBS_DIR to platform_tmp_folder
     jar_name = f"janice-{version_tag}-{platform.jar_platform_classifier}.jar"
@@ -208,19 +781,29 @@ def package_platform(platform: Platform, version_tag: str) -> int:
     if not source_jar.exists():
         print(f"Error: JAR not found at {source_jar}")
         return 1
-    
-    shutil.copy2(source_jar, dest_jar)
+
+    # copyfile uses in-kernel copy (sendfile/copy_file_range) where
+    # available, and nothing needs the source's timestamps here.
+    shutil.copyfile(source_jar, dest_jar)
 
     # 5. Find bin/java executable relative to platform_tmp_folder
+    java_name = "java.exe" if platform.shell_type == ShellType.BAT else "java"
     java_bin_path = None
-    for p in platform_tmp_folder.rglob("bin/java*"):
-        if platform.shell_type == ShellType.BAT and p.name == "java.exe":
-            java_bin_path = p.relative_to(platform_tmp_folder)
+
+    # Kona archives unpack to a single top-level jdk directory with bin/
+    # right under it; probing that spot avoids walking the whole JDK tree.
+    for top in platform_tmp_folder.iterdir():
+        candidate = top / "bin" / java_name
+        if top.is_dir() and candidate.is_file():
+            java_bin_path = candidate.relative_to(platform_tmp_folder)
             break
-        elif platform.shell_type == ShellType.BASH and p.name == "java":
+
+    if java_bin_path is None:
+        # Unexpected layout (e.g. macOS Contents/Home); fall back to a walk.
+        for p in platform_tmp_folder.rglob(f"bin/{java_name}"):
             java_bin_path = p.relative_to(platform_tmp_folder)
             break
-    
+
     if not java_bin_path:
         print(f"Error: Could not find java executable in {platform_tmp_folder}")
         return 1
@@ -242,29 +825,41 @@ def package_platform(platform: Platform, version_tag: str) -> int:
     if platform.shell_type == ShellType.BASH:
         script_path.chmod(0o755)
 
-    # 7. Move platform_tmp_folder to OUTPUT_DIR and rename
-    final_dir_name = f"janice-{version_tag}-{platform.key}"
+    # 7. Optionally materialize the uncompressed tree in OUTPUT_DIR.
+    # The tmp tree already has the final directory name, so by default
+    # the archive is built straight from it with no extra move or walk.
     final_path = OUTPUT_DIR / final_dir_name
-    
-    if final_path.exists():
-        shutil.rmtree(final_path)
-    
-    shutil.move(str(platform_tmp_folder), str(final_path))
-    print(f"[{platform.key}] Package created at: {final_path}")
-
-    # 8. Compress the final_path into archive
-    archive_name = f"{final_dir_name}.{'zip' if platform.compress_to == ArchiveType.ZIP else 'tar.gz'}"
+    source_tree = platform_tmp_folder
+
+    if keep_tree:
+        if final_path.exists():
+            rmtree_robust(final_path)
+
+        # Both live under WORK_DIR, i.e. on the same filesystem, so this is
+        # a single rename(2) instead of shutil.move's possible copy+delete.
+        assert WORK_DIR.resolve() in platform_tmp_folder.resolve().parents
+        assert WORK_DIR.resolve() in final_path.resolve().parents
+        os.replace(platform_tmp_folder, final_path)
+        print(f"[{platform.key}] Package created at: {final_path}")
+        source_tree = final_path
+
+    # 8. Compress the package tree into archive
+    compress_to = platform.compress_to
+    if compress_to == ArchiveType.ZSTD and use_gzip:
+        compress_to = ArchiveType.TGZ
+    if compress_to == ArchiveType.ZSTD and zstandard is None:
+        print(f"[{platform.key}] zstandard module not installed, falling back to tar.gz.")
+        compress_to = ArchiveType.TGZ
+
+    archive_name = f"{final_dir_name}.{ARCHIVE_TYPE_EXTENSIONS[compress_to]}"
     archive_path = OUTPUT_DIR / archive_name
     print(f"[{platform.key}] Compressing package to {archive_path}...")
-    if platform.compress_to == ArchiveType.ZIP:
-        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(final_path):
-                for file in files:
-                    file_path = Path(root) / file
-                    zipf.write(file_path, file_path.relative_to(final_path))
+    if compress_to == ArchiveType.ZIP:
+        compress_zip(source_tree, archive_path, level=compress_level)
+    elif compress_to == ArchiveType.ZSTD:
+        compress_tar_zst(source_tree, archive_path, level=compress_level)
     else:
-        with tarfile.open(archive_path, "w:gz") as tar:
-            tar.add(final_path, arcname=final_dir_name, filter=tar_permission_filter)
+        compress_tar_gz(source_tree, archive_path, level=compress_level)
 
     return 0
 
@@ -272,18 +867,53 @@ def package_platform(platform: Platform, version_tag: str) -> int:
 def main() -> int:
     argparser = argparse.ArgumentParser(description="Package Janice for deployment.")
     argparser.add_argument("--version", type=str, required=True, help="Version tag for the package. Like: 0.0.1")
+    argparser.add_argument("--gzip", action="store_true", help="Emit .tar.gz instead of .tar.zst for compatibility.")
+    argparser.add_argument("--keep-tree", action="store_true", help="Also leave the uncompressed package tree in the output directory.")
+    argparser.add_argument("--compress-level", type=int, default=None,
+                           help="Compression level override. Defaults: gzip 6, zstd 3, zip library default.")
     args = argparser.parse_args()
 
-    res = gradle_package_all()
-    if res != 0:
-        return res
-    
-    for platform_key, platform_data in platforms.items():
-        print(f"\n--- Packaging for {platform_key} ---")
-        res = package_platform(platform_data, args.version)
+    source_hash = compute_source_hash()
+    if gradle_outputs_cached(args.version, source_hash):
+        print("Sources unchanged since last packaging, skipping gradle build.")
+    else:
+        res = gradle_package_all()
         if res != 0:
-            print(f"Failed to package {platform_key}")
             return res
+        if source_hash is not None:
+            PACKAGE_CACHE_HASH_FILE.write_text(source_hash)
+
+    # Prepare the shared WORK_DIR layout once, before workers start.
+    if TMP_DIR.exists():
+        rmtree_robust(TMP_DIR)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    JDK_DIR.mkdir(parents=True, exist_ok=True)
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Platform builds are independent (own JDK download, extract,
+    # compress), so run them in parallel processes.
+    print(f"\n--- Packaging for: {', '.join(platforms)} ---")
+    failed = False
+    with ProcessPoolExecutor(max_workers=len(platforms)) as executor:
+        futures = {
+            executor.submit(package_platform, platform_data, args.version,
+                            args.gzip, args.keep_tree, args.compress_level): platform_key
+            for platform_key, platform_data in platforms.items()
+        }
+        for future in as_completed(futures):
+            platform_key = futures[future]
+            try:
+                res = future.result()
+            except Exception as e:
+                print(f"Failed to package {platform_key}: {e}")
+                failed = True
+                continue
+            if res != 0:
+                print(f"Failed to package {platform_key}")
+                failed = True
+
+    if failed:
+        return 1
 
     print("\nAll platforms packaged successfully.")
     return 0